@@ -1,8 +1,124 @@
 """
 This class is responsible for storing all the information about the current state of a chess game. It will also be responsible for determining the valid moves at the current state. It will also keep a move log.
 """
+import random
 from operator import truediv
 
+'''
+Bitboard support. Squares are numbered 0..63 as r*8+c, so bit 0 is the top-left
+square (a8) and bit 63 the bottom-right (h1). Every piece kind keeps its own
+64-bit integer mask, and occupancy masks are maintained incrementally so that
+"is this square empty/enemy" becomes a single bit test instead of string work.
+'''
+PIECE_KEYS = ('wp', 'wR', 'wN', 'wB', 'wQ', 'wK',
+              'bp', 'bR', 'bN', 'bB', 'bQ', 'bK')
+WHITE_PIECES = PIECE_KEYS[:6]
+BLACK_PIECES = PIECE_KEYS[6:]
+
+FULL_BOARD = (1 << 64) - 1
+FILE_A = 0x0101010101010101 #col 0 on every row
+FILE_H = FILE_A << 7
+RANK_3 = 0xFF << 24 #row 3, black double-push targets
+RANK_4 = 0xFF << 32 #row 4, white double-push targets
+
+# ray directions as (dr, dc); the first four are rook rays, the last four bishop rays
+RAY_DIRECTIONS = ((-1, 0), (0, -1), (1, 0), (0, 1),
+                  (-1, -1), (-1, 1), (1, -1), (1, 1))
+ROOK_RAYS = (0, 1, 2, 3)
+BISHOP_RAYS = (4, 5, 6, 7)
+QUEEN_RAYS = ROOK_RAYS + BISHOP_RAYS
+#each ray family paired with the slider kinds that attack along it
+SLIDER_RAY_GROUPS = ((ROOK_RAYS, 'RQ'), (BISHOP_RAYS, 'BQ'))
+# whether stepping along the ray increases the square index (tells us if the
+# nearest blocker on that ray is the lowest or the highest set bit)
+RAY_INCREASING = tuple(dr * 8 + dc > 0 for dr, dc in RAY_DIRECTIONS)
+
+# RAYS[d][sq] = mask of every square reachable from sq along direction d
+RAYS = [[0] * 64 for _ in range(8)]
+for _d in range(8):
+    for _sq in range(64):
+        _r, _c = _sq // 8, _sq % 8
+        _mask = 0
+        _r += RAY_DIRECTIONS[_d][0]
+        _c += RAY_DIRECTIONS[_d][1]
+        while 0 <= _r < 8 and 0 <= _c < 8:
+            _mask |= 1 << (_r * 8 + _c)
+            _r += RAY_DIRECTIONS[_d][0]
+            _c += RAY_DIRECTIONS[_d][1]
+        RAYS[_d][_sq] = _mask
+del _d, _sq, _r, _c, _mask
+
+'''
+Knight and king destinations never depend on occupancy, so the delta
+arithmetic and bounds checks are done once at import time. Entry sq holds the
+in-board (row, col) destinations for a piece standing on square sq.
+'''
+KNIGHT_DELTAS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_DELTAS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def buildStepTable(deltas):
+    table = []
+    for sq in range(64):
+        r, c = sq // 8, sq % 8
+        table.append(tuple((r + dr, c + dc) for dr, dc in deltas
+                           if 0 <= r + dr < 8 and 0 <= c + dc < 8))
+    return table
+
+
+KNIGHT_ATTACKS = buildStepTable(KNIGHT_DELTAS)
+KING_ATTACKS = buildStepTable(KING_DELTAS)
+
+
+def maskFromSquares(table):
+    return [sum(1 << (r * 8 + c) for r, c in squares) for squares in table]
+
+
+KNIGHT_MASKS = maskFromSquares(KNIGHT_ATTACKS)
+KING_MASKS = maskFromSquares(KING_ATTACKS)
+
+#ATTACK_REACH[sq] = every square from which some piece could attack sq in one
+#move: the knight hops plus all eight queen rays (pawn and king attack squares
+#are a subset of the rays). If no enemy piece overlaps this mask, sq cannot
+#be attacked and the detailed checks can be skipped entirely.
+ATTACK_REACH = [KNIGHT_MASKS[sq] | sum(RAYS[d][sq] for d in QUEEN_RAYS)
+                for sq in range(64)]
+
+'''
+Zobrist hashing: every (piece, square) pair gets a fixed random 64-bit
+number, plus one for the side to move. A position's hash is the XOR of the
+numbers for its occupied squares, which can be maintained incrementally --
+moving a piece XORs two entries, and XOR being its own inverse means
+undoMove reuses the same update. The seed is fixed so hashes are stable
+across runs.
+'''
+PIECE_INDEX = {piece: i for i, piece in enumerate(PIECE_KEYS)}
+_zobristRandom = random.Random(0)
+ZOBRIST = [[_zobristRandom.getrandbits(64) for _ in range(64)] for _ in PIECE_KEYS]
+ZOBRIST_SIDE = _zobristRandom.getrandbits(64)
+del _zobristRandom
+
+#compiled slider kernel, if the optional Cython extension has been built
+#(python setup.py build_ext --inplace); otherwise stay pure Python
+try:
+    from Chess import _movegen_cy
+    _movegen_cy.init_tables(RAYS, RAY_INCREASING)
+    _sliderTargetsC = _movegen_cy.slider_targets
+except ImportError:
+    _sliderTargetsC = None
+
+#search constants: classic material values, and a mate score well above any
+#material swing so checkmates dominate every other consideration
+PIECE_VALUES = {'p': 1, 'N': 3, 'B': 3, 'R': 5, 'Q': 9, 'K': 0, '-': 0}
+
+#MVV-LVA ordering key: grab the Most Valuable Victim with the Least Valuable
+#Attacker first, so the likely-best captures are searched before quiet moves
+#and beta cutoffs fire early (sort is ascending, hence the negation)
+def mvvLvaKey(move):
+    return PIECE_VALUES[move.pieceMoved[1]] - 10 * PIECE_VALUES[move.pieceCaptured[1]]
+CHECKMATE_SCORE = 1000
+INFINITY = 10000
+
 
 class GameState:
     def __init__(self):
@@ -20,8 +136,46 @@ class GameState:
             ["wp", "wp", "wp", "wp", "wp", "wp", "wp", "wp"],
             ["wR", "wN", "wB", "wQ", "wK", "wB", "wN", "wR"]
         ]
-        self.moveFunctions = {'p': self.getPawnmoves, 'R': self.getRookmoves, 'N': self.getKnightmoves,
-                              'B': self.getBishopmoves, 'Q': self.getQueenmoves, 'K': self.getKingmoves}
+        #generator dispatch paired with each side's bitboard keys up front, so
+        #move generation never hashes a piece name to find its function; pawns
+        #are not listed because getPawnmoves handles the whole pawn bitboard
+        pieceGenerators = (self.getRookmoves, self.getKnightmoves,
+                           self.getBishopmoves, self.getQueenmoves, self.getKingmoves)
+        self.whiteGenerators = tuple(zip(WHITE_PIECES[1:], pieceGenerators))
+        self.blackGenerators = tuple(zip(BLACK_PIECES[1:], pieceGenerators))
+
+        #one bitboard per piece kind, built from the starting board, plus
+        #occupancy masks for each color and for the whole board
+        self.bb = {piece: 0 for piece in PIECE_KEYS}
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece != "--":
+                    self.bb[piece] |= 1 << (r * 8 + c)
+        self.occ_w = 0
+        self.occ_b = 0
+        for piece in PIECE_KEYS:
+            if piece[0] == 'w':
+                self.occ_w |= self.bb[piece]
+            else:
+                self.occ_b |= self.bb[piece]
+        self.occ = self.occ_w | self.occ_b
+
+        #incremental Zobrist hash of the position (white to move at the start,
+        #so no ZOBRIST_SIDE term yet) and a move cache keyed by it
+        self.zhash = 0
+        for piece in PIECE_KEYS:
+            pieceBB = self.bb[piece]
+            zobristPiece = ZOBRIST[PIECE_INDEX[piece]]
+            while pieceBB:
+                lsb = pieceBB & -pieceBB
+                self.zhash ^= zobristPiece[lsb.bit_length() - 1]
+                pieceBB ^= lsb
+        self._validMovesCache = {}
+
+        #reusable buffer for pseudo-move generation; 256 slots is comfortably
+        #above the most moves any position can have
+        self._moveBuf = [None] * 256
 
         self.whiteToMove = True
         self.moveLog = []
@@ -33,12 +187,14 @@ class GameState:
     def makeMove(self, move):
         self.board[move.startRow][move.startCol] = "--"
         self.board[move.endRow][move.endCol] = move.pieceMoved
+        self.updateBitboards(move)
         self.moveLog.append(move) # log the move so we can undo it later
         self.whiteToMove = not self.whiteToMove # swap players
+        self.zhash ^= ZOBRIST_SIDE
         #update the king's location if moved
-        if move.pieceMoved[1] == 'wK':
+        if move.pieceMoved == 'wK':
             self.whiteKingLocation = (move.endRow, move.endCol)
-        elif move.pieceMoved[1] == 'bK':
+        elif move.pieceMoved == 'bK':
             self.blackKingLocation = (move.endRow, move.endCol)
 
     def undoMove(self):
@@ -46,29 +202,166 @@ class GameState:
             move = self.moveLog.pop()
             self.board[move.startRow][move.startCol] = move.pieceMoved
             self.board[move.endRow][move.endCol] = move.pieceCaptured
+            self.updateBitboards(move) #XOR is its own inverse, same update undoes the move
             self.whiteToMove = not self.whiteToMove
+            self.zhash ^= ZOBRIST_SIDE
             #update the king's position if needed
-            if move.pieceMoved[1] == 'wK':
+            if move.pieceMoved == 'wK':
                 self.whiteKingLocation = (move.startRow, move.startCol)
-            elif move.pieceMoved[1] == 'bK':
+            elif move.pieceMoved == 'bK':
                 self.blackKingLocation = (move.startRow, move.startCol)
 
-    def getValidMoves(self):
-        #1.) generate all possible moves
-        moves = self.getAllPossibleMoves()
-        #2.) for each move, make the move
-        for i in range(len(moves)-1,-1,-1): #when removing from a list go backwards through that list
-            self.makeMove(moves[i])
-            #3.) generate all opponent's move
-            #4.) for each of your opponent's moves, see if they attack your king
-            self.whiteToMove = not self.whiteToMove
-            if self.inCheck():
-                moves.remove(moves[i]) #5.) if they do attack your king, not a valid move
-            self.whiteToMove = not self.whiteToMove
-            self.undoMove()
+    '''
+    Keep the bitboards in sync with the 2d board. Moving a piece XORs its
+    from/to bits, a capture XORs the victim off its board; because XOR is its
+    own inverse the same call serves makeMove and undoMove.
+    '''
+    def updateBitboards(self, move):
+        self.xorBitboards(move.pieceMoved, move.pieceCaptured,
+                          move.startRow * 8 + move.startCol, move.endRow * 8 + move.endCol)
+
+    def xorBitboards(self, pieceMoved, pieceCaptured, fromSq, toSq):
+        fromTo = (1 << fromSq) | (1 << toSq)
+        self.bb[pieceMoved] ^= fromTo
+        zobristPiece = ZOBRIST[PIECE_INDEX[pieceMoved]]
+        self.zhash ^= zobristPiece[fromSq] ^ zobristPiece[toSq]
+        if pieceMoved[0] == 'w':
+            self.occ_w ^= fromTo
+        else:
+            self.occ_b ^= fromTo
+        if pieceCaptured != "--":
+            toBit = 1 << toSq
+            self.bb[pieceCaptured] ^= toBit
+            self.zhash ^= ZOBRIST[PIECE_INDEX[pieceCaptured]][toSq]
+            if pieceCaptured[0] == 'w':
+                self.occ_w ^= toBit
+            else:
+                self.occ_b ^= toBit
+        self.occ = self.occ_w | self.occ_b
+
+    '''
+    Lightweight make/undo working on a packed move ID, used for legality
+    testing inside getValidMoves. Only the board and bitboards are touched:
+    no Move object, no move log, no turn swap. applyMoveID returns the
+    captured piece so retractMoveID can put it back.
+    '''
+    def applyMoveID(self, moveID):
+        startRow = moveID >> 9
+        startCol = (moveID >> 6) & 7
+        endRow = (moveID >> 3) & 7
+        endCol = moveID & 7
+        board = self.board
+        pieceMoved = board[startRow][startCol]
+        pieceCaptured = board[endRow][endCol]
+        board[startRow][startCol] = "--"
+        board[endRow][endCol] = pieceMoved
+        self.xorBitboards(pieceMoved, pieceCaptured, startRow * 8 + startCol, endRow * 8 + endCol)
+        return pieceCaptured
+
+    def retractMoveID(self, moveID, pieceCaptured):
+        startRow = moveID >> 9
+        startCol = (moveID >> 6) & 7
+        endRow = (moveID >> 3) & 7
+        endCol = moveID & 7
+        board = self.board
+        pieceMoved = board[endRow][endCol]
+        board[startRow][startCol] = pieceMoved
+        board[endRow][endCol] = pieceCaptured
+        self.xorBitboards(pieceMoved, pieceCaptured, startRow * 8 + startCol, endRow * 8 + endCol)
+
+    '''
+    Mask of every square a slider on sq can see along the given rays: walk each
+    ray mask, cut it off at the nearest occupied square and keep that square so
+    captures are included.
+    '''
+    def sliderTargets(self, sq, rayIds):
+        if _sliderTargetsC is not None:
+            return _sliderTargetsC(sq, self.occ, rayIds)
+        occ = self.occ
+        targets = 0
+        for d in rayIds:
+            ray = RAYS[d][sq]
+            blockers = ray & occ
+            if blockers:
+                if RAY_INCREASING[d]:
+                    blockerSq = (blockers & -blockers).bit_length() - 1 #lowest set bit
+                else:
+                    blockerSq = blockers.bit_length() - 1 #highest set bit
+                ray ^= RAYS[d][blockerSq] #drop everything beyond the blocker
+            targets |= ray
+        return targets
 
-        if len(moves) == 0:  #either checkmate or stalemate
-            if self.inCheck():
+    def getValidMoves(self):
+        #the same position reached through a different move order hashes to
+        #the same key, so serve repeats straight from the cache
+        cached = self._validMovesCache.get(self.zhash)
+        if cached is not None:
+            legal, self.checkMate, self.staleMate = cached
+            return [self.moveFromID(moveID) for moveID in legal]
+
+        #compute pins and checks once, then filter the pseudo-moves against
+        #them; only king moves still need to be played out on the board
+        inCheck, pins, checks = self.computePinsAndChecks()
+        kingSq = self.bb['wK' if self.whiteToMove else 'bK'].bit_length()-1
+        kingRow, kingCol = kingSq>>3, kingSq&7
+        enemyColor = 'b' if self.whiteToMove else 'w'
+        pinned = {(pin[0], pin[1]): (pin[2], pin[3]) for pin in pins}
+
+        if inCheck:
+            if len(checks) == 1:
+                #a non-king move must capture the checker or block the ray
+                checkRow, checkCol, dr, dc = checks[0]
+                if self.board[checkRow][checkCol][1] == 'N': #knight checks can't be blocked
+                    validSquares = {(checkRow, checkCol)}
+                else:
+                    validSquares = set()
+                    r, c = kingRow + dr, kingCol + dc
+                    while True:
+                        validSquares.add((r, c))
+                        if r == checkRow and c == checkCol:
+                            break
+                        r += dr
+                        c += dc
+            else:
+                validSquares = set() #double check, only a king move can help
+        else:
+            validSquares = None #not in check, any destination is fine
+
+        legal = []
+        for moveID in self.getAllMoveIDs():
+            startRow = moveID >> 9
+            startCol = (moveID >> 6) & 7
+            endRow = (moveID >> 3) & 7
+            endCol = moveID & 7
+            if startRow == kingRow and startCol == kingCol:
+                #king moves are validated by playing them out so the king
+                #doesn't shadow its own escape squares
+                pieceCaptured = self.applyMoveID(moveID)
+                if not self.isSquareAttacked(endRow, endCol, enemyColor):
+                    legal.append(moveID)
+                self.retractMoveID(moveID, pieceCaptured)
+                continue
+            pinDir = pinned.get((startRow, startCol))
+            if pinDir is not None:
+                if inCheck:
+                    continue #a pinned piece can never resolve a check
+                dr, dc = pinDir
+                #the piece may only slide along the pin ray through the king
+                if dr == 0:
+                    if endRow != kingRow or (endCol - kingCol) * dc <= 0:
+                        continue
+                elif dc == 0:
+                    if endCol != kingCol or (endRow - kingRow) * dr <= 0:
+                        continue
+                elif ((endRow - kingRow) * dc != (endCol - kingCol) * dr
+                        or (endRow - kingRow) * dr <= 0):
+                    continue
+            if validSquares is not None and (endRow, endCol) not in validSquares:
+                continue
+            legal.append(moveID)
+
+        if len(legal) == 0:  #either checkmate or stalemate
+            if inCheck:
                 self.checkMate = True
             else:
                 self.staleMate = True
@@ -76,145 +369,323 @@ class GameState:
             self.checkMate = False
             self.staleMate = False
 
-        return moves
+        self._validMovesCache[self.zhash] = (legal, self.checkMate, self.staleMate)
+        #only the surviving moves get wrapped into Move objects for the caller
+        return [self.moveFromID(moveID) for moveID in legal]
+
+    '''
+    Scan outward from our king once per position. Returns (inCheck, pins,
+    checks): pins are (row, col, dr, dc) for own pieces that sit between the
+    king and an enemy slider on direction (dr, dc); checks are the same shape
+    for the pieces currently giving check.
+    '''
+    def computePinsAndChecks(self):
+        board = self.board
+        if self.whiteToMove:
+            allyColor, enemyColor = 'w', 'b'
+            kingSq = self.bb['wK'].bit_length()-1
+        else:
+            allyColor, enemyColor = 'b', 'w'
+            kingSq = self.bb['bK'].bit_length()-1
+        kingRow, kingCol = kingSq>>3, kingSq&7
+        pins = []
+        checks = []
+        inCheck = False
+        for d in QUEEN_RAYS:
+            dr, dc = RAY_DIRECTIONS[d]
+            possiblePin = None
+            for i in range(1, 8):
+                r = kingRow + dr * i
+                c = kingCol + dc * i
+                if (r | c) & ~7: #off the board
+                    break
+                piece = board[r][c]
+                if piece == "--":
+                    continue
+                if piece[0] == allyColor:
+                    if possiblePin is None:
+                        possiblePin = (r, c, dr, dc)
+                    else:
+                        break #second own piece on the ray, no pin possible
+                else:
+                    pieceType = piece[1]
+                    #does this enemy piece attack back down the ray?
+                    if ((d < 4 and pieceType in 'RQ')
+                            or (d >= 4 and pieceType in 'BQ')
+                            or (i == 1 and pieceType == 'K')
+                            or (i == 1 and d >= 4 and pieceType == 'p'
+                                and ((enemyColor == 'b' and dr == -1)
+                                     or (enemyColor == 'w' and dr == 1)))):
+                        if possiblePin is None:
+                            inCheck = True
+                            checks.append((r, c, dr, dc))
+                        else:
+                            pins.append(possiblePin)
+                    break #any enemy piece ends the ray either way
+        if self.bb[enemyColor + 'N'] & KNIGHT_MASKS[kingSq]: #any knight in range at all?
+            for endRow, endCol in KNIGHT_ATTACKS[kingSq]:
+                if board[endRow][endCol] == enemyColor + 'N':
+                    inCheck = True
+                    checks.append((endRow, endCol, 0, 0))
+        return inCheck, pins, checks
+
+    '''
+    Build a Move object from a packed ID; the board must be in the position
+    the move is played from.
+    '''
+    def moveFromID(self, moveID):
+        startRow = moveID >> 9
+        startCol = (moveID >> 6) & 7
+        endRow = (moveID >> 3) & 7
+        endCol = moveID & 7
+        board = self.board
+        return Move((startRow, startCol), (endRow, endCol),
+                    board[startRow][startCol], board[endRow][endCol])
 
     '''
     Determine if the current player is in check
     '''
     def inCheck(self):
         if self.whiteToMove:
-            return self.squareUnderAttack(self.whiteKingLocation[0], self.whiteKingLocation[1])
+            return self.isSquareAttacked(self.whiteKingLocation[0], self.whiteKingLocation[1], 'b')
         else:
-            return self.squareUnderAttack(self.blackKingLocation[0], self.blackKingLocation[1])
+            return self.isSquareAttacked(self.blackKingLocation[0], self.blackKingLocation[1], 'w')
 
     '''
     Determine if the enemy can attack the square r, c'''
     def squareUnderAttack(self, r, c):
-        self.whiteToMove = not self.whiteToMove  #switch to opponent's turn
-        oppMoves = self.getAllPossibleMoves()
-        self.whiteToMove = not self.whiteToMove # switch turns back
-        for move in oppMoves:
-            if move.endRow == r and move.endCol == c: #square is under attack
+        return self.isSquareAttacked(r, c, 'b' if self.whiteToMove else 'w')
+
+    '''
+    Is square (r, c) attacked by any piece of byColor? Instead of generating
+    every move the attacker has, look outward from the square itself: knight
+    and king patterns first, then the two pawn capture squares, then walk the
+    rook and bishop rays until the first piece and see what it is.
+    '''
+    def isSquareAttacked(self, r, c, byColor):
+        sq = r * 8 + c
+        enemyOcc = self.occ_w if byColor == 'w' else self.occ_b
+        #cheap pre-filter: if no enemy piece sits on a knight hop or queen ray
+        #from the square, nothing can possibly attack it
+        if not enemyOcc & ATTACK_REACH[sq]:
+            return False
+        board = self.board
+        #a knight/king bit overlapping the attack mask is already an attack
+        if self.bb[byColor + 'N'] & KNIGHT_MASKS[sq]:
+            return True
+        if self.bb[byColor + 'K'] & KING_MASKS[sq]:
+            return True
+        #a white pawn attacks from the row below the square, a black one from above
+        pawnRow = r + 1 if byColor == 'w' else r - 1
+        if not pawnRow & ~7: #on the board iff no bits outside 0..7
+            if c - 1 >= 0 and board[pawnRow][c-1] == byColor + 'p':
+                return True
+            if c + 1 <= 7 and board[pawnRow][c+1] == byColor + 'p':
                 return True
+        for rayIds, sliders in SLIDER_RAY_GROUPS:
+            for d in rayIds:
+                dr, dc = RAY_DIRECTIONS[d]
+                endrow, endcol = r + dr, c + dc
+                while not (endrow | endcol) & ~7: #single test for both bounds
+                    endpiece = board[endrow][endcol]
+                    if endpiece != "--":
+                        if endpiece[0] == byColor and endpiece[1] in sliders:
+                            return True
+                        break
+                    endrow += dr
+                    endcol += dc
         return False
 
-    def  getAllPossibleMoves(self):
-        moves=[]
-        for r in range(len(self.board)):
-            for c in range(len(self.board[r])):
-                turn = self.board[r][c][0]
-                if(turn == 'w' and self.whiteToMove) or (turn == 'b' and not self.whiteToMove):
-                    piece=self.board[r][c][1]
-                    self.moveFunctions[piece](r,c,moves) #calls the appropriate move function according to the piece type
-        return moves
-    '''get all possible moves for a pawn'''
-    def getPawnmoves(self,r,c,moves):
+    def  getAllPossibleMoves(self, whiteToMove=None):
+        return [self.moveFromID(moveID) for moveID in self.getAllMoveIDs(whiteToMove)]
 
+    '''
+    Generate every pseudo-legal move for the side to move as packed 12-bit
+    IDs, (startRow<<9)|(startCol<<6)|(endRow<<3)|endCol. Ints are free to
+    create and compare, so the inner loops never build a Move object.
+    '''
+    def getAllMoveIDs(self, whiteToMove=None):
+        #the side to generate for is an explicit parameter (defaulting to the
+        #side to move), so callers never have to flip whiteToMove back and
+        #forth just to look at the opponent's moves
+        if whiteToMove is None:
+            whiteToMove = self.whiteToMove
+        #write into the preallocated buffer by index instead of growing a new
+        #list with append; the generators pass the fill count along and only
+        #the filled slots are copied out at the end
+        moves = self._moveBuf
+        bb = self.bb
+        #all pawn moves come out of four bitboard shifts in one call
+        cnt = self.getPawnmoves(moves, 0, whiteToMove)
+        #iterate the set bits of our own piece bitboards instead of scanning
+        #all 64 squares and inspecting piece strings
+        for piece, moveFunction in self.whiteGenerators if whiteToMove else self.blackGenerators:
+            pieceBB = bb[piece]
+            while pieceBB:
+                lsb = pieceBB & -pieceBB
+                sq = lsb.bit_length()-1
+                cnt = moveFunction(sq>>3,sq&7,moves,cnt,whiteToMove) #calls the appropriate move function according to the piece type
+                pieceBB ^= lsb
+        return moves[:cnt]
+    '''
+    Get all possible moves for every pawn of the side to move at once. Four
+    bitboard shifts produce the single-push, double-push and both capture
+    target sets for the whole pawn bitboard -- the file masks stop shifts from
+    wrapping around the board edge, and shifting off the top or bottom rank
+    just drops the bit, which also covers promotion-less stranded pawns. Each
+    target set is then unpacked with a lowest-set-bit loop; a square index is
+    (row<<3)|col, so the packed move ID is simply (startSq<<6)|endSq.
+    '''
+    def getPawnmoves(self,moves,cnt,whiteToMove):
+        empty = ~self.occ & FULL_BOARD
+        if whiteToMove: #white pawns move toward row 0, square index -8
+            pawns = self.bb['wp']
+            enemy = self.occ_b
+            singles = (pawns >> 8) & empty
+            targetSets = ((singles, 8), #one step move
+                          ((singles >> 8) & empty & RANK_4, 16), #two step initial move
+                          ((pawns >> 9) & ~FILE_H & enemy, 9), #capture toward col-1
+                          ((pawns >> 7) & ~FILE_A & enemy, 7)) #capture toward col+1
+        else: #black pawns move toward row 7, square index +8
+            pawns = self.bb['bp']
+            enemy = self.occ_w
+            singles = ((pawns << 8) & empty)
+            targetSets = ((singles, -8), #one step move
+                          ((singles << 8) & empty & RANK_3, -16), #two step initial move
+                          ((pawns << 7) & ~FILE_H & enemy, -7), #capture toward col-1
+                          ((pawns << 9) & ~FILE_A & enemy, -9)) #capture toward col+1
+        for targets, delta in targetSets:
+            while targets:
+                lsb = targets & -targets
+                endSq = lsb.bit_length()-1
+                moves[cnt]=((endSq+delta)<<6)|endSq; cnt+=1
+                targets ^= lsb
+        return cnt
 
-        if self.whiteToMove: #white pawn moves
-            if self.board[r-1][c]=="--": #one step move
-                moves.append(Move((r,c),(r-1,c),self.board))
-                if r==6 and self.board[r-2][c]=="--": #two step initial move
-                    moves.append(Move((r,c),(r-2,c),self.board))
-            if c-1>=0 and self.board[r-1][c-1][0]=="b": #capturing enemy on right side
-                moves.append(Move((r,c),(r-1,c-1),self.board))
-            if c+1<=7 and self.board[r-1][c+1][0]=="b": #capturing enemy on the left side
-                moves.append(Move((r,c),(r-1,c+1),self.board))
 
 
-        else: #black pawn moves
-            if self.board[r+1][c]=="--": #one step move
-                moves.append(Move((r,c),(r+1,c),self.board))
-                if r==1 and self.board[r+2][c]=="--": #2 step intial move
-                    moves.append(Move((r,c),(r+2,c),self.board))
-            if c-1>=0 and self.board[r+1][c-1][0]=="w": #capturing enemy on right side
-                moves.append(Move((r,c),(r+1,c-1),self.board))
-            if c+1<=7 and self.board[r+1][c+1][0]=="w": #capturing enemy on left side
-                moves.append(Move((r,c),(r+1,c+1),self.board))
 
 
+    '''get all possible moves for a rook'''
+    def getRookmoves(self,r,c,moves,cnt,whiteToMove):
+        return self.getSlidermoves(r,c,ROOK_RAYS,moves,cnt,whiteToMove)
 
+    '''
+    Shared slider generation: targets is a bitboard, masking off our own pieces
+    replaces the per-square color test, then a lowest-set-bit loop turns the
+    remaining bits into packed move IDs. A square index is already
+    (row<<3)|col, so it drops straight into the low bits of the ID.
+    '''
+    def getSlidermoves(self,r,c,rayIds,moves,cnt,whiteToMove):
+        own = self.occ_w if whiteToMove else self.occ_b
+        targets = self.sliderTargets(r*8+c, rayIds) & ~own
+        fromID = (r<<9)|(c<<6)
+        while targets:
+            lsb = targets & -targets
+            moves[cnt]=fromID|(lsb.bit_length()-1); cnt+=1
+            targets ^= lsb
+        return cnt
+    #
 
+    def getKnightmoves(self,r,c,moves,cnt,whiteToMove):
+        board = self.board
+        allyColor='w' if whiteToMove else 'b'
+        fromID = (r<<9)|(c<<6)
+        for endrow,endcol in KNIGHT_ATTACKS[r*8+c]:
+            if board[endrow][endcol][0]!=allyColor:
+                moves[cnt]=fromID|(endrow<<3)|endcol; cnt+=1
+        return cnt
 
-    '''get all possible moves for a rook'''
-    def getRookmoves(self,r,c,moves):
-        directions=((-1,0),(0,-1),(1,0),(0,1))
-        enemyColor='b' if self.whiteToMove else 'w'
-        for d in directions:
-            for i in range(1,8):
-                endrow=r+d[0]*i
-                endcol=c+d[1]*i
-                if 0<=endrow<8 and 0<=endcol<8:
-                    endpiece=self.board[endrow][endcol]
-                    if endpiece=="--":
-                        moves.append(Move((r,c),(endrow,endcol),self.board))
-                    elif endpiece[0]==enemyColor:
-                        moves.append(Move((r,c),(endrow,endcol),self.board))
-                        break
-                    else:
-                        break
-                else:
-                    break
-    #
 
-    def getKnightmoves(self,r,c,moves):
-        knightmoves= ((-2,-1),(-2,1),(-1,-2),(-1,2),(1,-2),(1,2),(2,-1),(2,1))
-        allyColor='w' if self.whiteToMove else 'b'
-        for m in knightmoves:
-            endrow=r+m[0]
-            endcol=c+m[1]
-            if 0<=endrow<8 and 0<=endcol<8:
-                endpiece=self.board[endrow][endcol]
-                if endpiece[0]!=allyColor:
-                    moves.append(Move((r,c),(endrow,endcol),self.board))
-
-
-
-    def getBishopmoves(self,r,c,moves):
-        directions=((-1,-1),(-1,1),(1,-1),(1,1))
-        enemyColor='b' if self.whiteToMove else 'w'
-        for d in directions:
-            for i in range(1,8):
-                endrow=r+d[0]*i
-                endcol=c+d[1]*i
-                if 0<=endrow<8 and 0<=endcol<8:
-                    endpiece=self.board[endrow][endcol]
-                    if endpiece=="--":
-                        moves.append(Move((r,c),(endrow,endcol),self.board))
-                    elif endpiece[0]==enemyColor:
-                        moves.append(Move((r,c),(endrow,endcol),self.board))
-                        break
-                    else:
-                        break
-                else:
-                    break
 
+    def getBishopmoves(self,r,c,moves,cnt,whiteToMove):
+        return self.getSlidermoves(r,c,BISHOP_RAYS,moves,cnt,whiteToMove)
 
 
+    def getQueenmoves(self,r,c,moves,cnt,whiteToMove):
+        return self.getSlidermoves(r,c,QUEEN_RAYS,moves,cnt,whiteToMove)
+    def getKingmoves(self,r,c,moves,cnt,whiteToMove):
+        board = self.board
+        allyColor='w' if whiteToMove else 'b'
+        fromID = (r<<9)|(c<<6)
+        for endrow,endcol in KING_ATTACKS[r*8+c]:
+            if board[endrow][endcol][0]!=allyColor:
+                moves[cnt]=fromID|(endrow<<3)|endcol; cnt+=1
+        return cnt
 
 
 
-    def getQueenmoves(self,r,c,moves):
-        self.getRookmoves(r,c,moves)
-        self.getBishopmoves(r,c,moves)
-    def getKingmoves(self,r,c,moves):
-        kingmoves=((-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1))
-        allyColor='w' if self.whiteToMove else 'b'
-        for i in range(8):
-            endrow=r+kingmoves[i][0]
-            endcol=c+kingmoves[i][1]
 
-            if 0<=endrow<8 and 0<=endcol<8:
-                endpiece=self.board[endrow][endcol]
-                if endpiece[0]!=allyColor:
-                    moves.append(Move((r,c),(endrow,endcol),self.board))
 
 
+    '''
+    Material balance counted straight off the bitboards, from the side to
+    move's point of view (positive = good for whoever moves next).
+    '''
+    def evaluate(self):
+        score = 0
+        for piece in PIECE_KEYS:
+            value = PIECE_VALUES[piece[1]]
+            if value:
+                value *= self.bb[piece].bit_count()
+                score += value if piece[0] == 'w' else -value
+        return score if self.whiteToMove else -score
 
+    '''
+    Fail-hard negamax with alpha-beta pruning: score is always from the side
+    to move's perspective, so one recursion with a negated, swapped window
+    covers both players. Cutoffs use >= so a move that merely equals beta
+    already refutes the line.
+    '''
+    def negamax(self, depth, alpha, beta):
+        if depth == 0:
+            return self.evaluate()
+        moves = self.getValidMoves()
+        if self.checkMate:
+            return -(CHECKMATE_SCORE + depth) #prefer the faster mate
+        if self.staleMate:
+            return 0
+        moves.sort(key=mvvLvaKey) #captures of big pieces first
+        for move in moves:
+            self.makeMove(move)
+            score = -self.negamax(depth - 1, -beta, -alpha)
+            self.undoMove()
+            if score >= beta:
+                return beta
+            if score > alpha:
+                alpha = score
+        return alpha
 
+    '''
+    Iterative deepening driver: search depth 1, 2, ... maxDepth and keep the
+    best move of the deepest completed pass. Returns None if the game is over.
+    '''
+    def findBestMove(self, maxDepth=3):
+        bestMove = None
+        for depth in range(1, maxDepth + 1):
+            alpha = -INFINITY
+            bestMoveAtDepth = None
+            moves = self.getValidMoves()
+            moves.sort(key=mvvLvaKey)
+            for move in moves:
+                self.makeMove(move)
+                score = -self.negamax(depth - 1, -INFINITY, -alpha)
+                self.undoMove()
+                if bestMoveAtDepth is None or score > alpha:
+                    alpha = score
+                    bestMoveAtDepth = move
+            if bestMoveAtDepth is None:
+                break #no legal moves, checkmate or stalemate
+            bestMove = bestMoveAtDepth
+        return bestMove
 
 
 class Move():
+    #no per-instance __dict__: attribute reads become fixed slot offsets and
+    #each Move shrinks to the seven fields it actually carries
+    __slots__ = ('startRow', 'startCol', 'endRow', 'endCol',
+                 'pieceMoved', 'pieceCaptured', 'moveID')
+
     # maps keys to values
     # key : value
     ranksToRows = {"1": 7, "2": 6, "3": 5, "4": 4,
@@ -224,14 +695,16 @@ class Move():
                    "e": 4, "f": 5, "g": 6, "h": 7}
     colsToFiles = {v: k for k, v in filesToCols.items()}
 
-    def __init__(self, startSq, endSq, board):
+    def __init__(self, startSq, endSq, pieceMoved, pieceCaptured):
         self.startRow = startSq[0]
         self.startCol = startSq[1]
         self.endRow = endSq[0]
         self.endCol = endSq[1]
-        self.pieceMoved = board[self.startRow][self.startCol]
-        self.pieceCaptured = board[self.endRow][self.endCol]
-        self.moveID = self.startRow * 1000 + self.startCol * 100 + self.endRow * 10 + self.endCol
+        #the caller already knows both pieces, no need to index the board again
+        self.pieceMoved = pieceMoved
+        self.pieceCaptured = pieceCaptured
+        #same packing the move generators use: (sr<<9)|(sc<<6)|(er<<3)|ec
+        self.moveID = (self.startRow << 9) | (self.startCol << 6) | (self.endRow << 3) | self.endCol
 
 
     '''Overridig the equals method to compare moves'''
@@ -240,6 +713,11 @@ class Move():
             return self.moveID == other.moveID
         return False
 
+    '''Defining __eq__ alone sets __hash__ to None; hash by the same moveID the
+    equality uses so Moves can live in sets and as dict keys'''
+    def __hash__(self):
+        return self.moveID
+
     def getChessNotation(self):
         # You can add to make this like real chess notation
         return self.getRankFile(self.startRow, self.startCol) + self.getRankFile(self.endRow, self.endCol)
@@ -54,7 +54,10 @@ def main():
                     sqSelected = (row, col)
                     playerClicks.append(sqSelected) # append for both 1st and 2nd clicks
                 if len(playerClicks) == 2: #after the 2nd click
-                    move = ChessEngine.Move(playerClicks[0], playerClicks[1], gs.board)
+                    startSq, endSq = playerClicks
+                    move = ChessEngine.Move(startSq, endSq,
+                                            gs.board[startSq[0]][startSq[1]],
+                                            gs.board[endSq[0]][endSq[1]])
                     print(move.getChessNotation())
                     if move in validMoves:
                         gs.makeMove(move)
@@ -0,0 +1,58 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Optional compiled kernel for the hottest move-generation primitive. Build with
+
+    python setup.py build_ext --inplace
+
+(or `cythonize -3 -i Chess/_movegen_cy.pyx`). ChessEngine falls back to the
+pure-Python implementation when this module is not built, so a compiler is
+never required to play.
+"""
+from libc.stdint cimport uint64_t
+
+cdef uint64_t RAYS_C[8][64]
+cdef int RAY_INC[8]
+
+
+def init_tables(rays, increasing):
+    """Copy the ray masks built by ChessEngine into C arrays, once at import."""
+    cdef int d, sq
+    for d in range(8):
+        RAY_INC[d] = 1 if increasing[d] else 0
+        for sq in range(64):
+            RAYS_C[d][sq] = rays[d][sq]
+
+
+cdef inline int _bitScanForward(uint64_t b):
+    cdef int i = 0
+    while not b & 1:
+        b >>= 1
+        i += 1
+    return i
+
+
+cdef inline int _bitScanReverse(uint64_t b):
+    cdef int i = 63
+    while not b >> 63:
+        b <<= 1
+        i -= 1
+    return i
+
+
+def slider_targets(int sq, uint64_t occ, tuple rayIds):
+    """C twin of GameState.sliderTargets: mask of squares a slider on sq can
+    see along the given rays, cut off at (and including) the first blocker."""
+    cdef uint64_t targets = 0
+    cdef uint64_t ray, blockers
+    cdef int d, blockerSq
+    for d in rayIds:
+        ray = RAYS_C[d][sq]
+        blockers = ray & occ
+        if blockers:
+            if RAY_INC[d]:
+                blockerSq = _bitScanForward(blockers)
+            else:
+                blockerSq = _bitScanReverse(blockers)
+            ray ^= RAYS_C[d][blockerSq]
+        targets |= ray
+    return targets
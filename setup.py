@@ -0,0 +1,15 @@
+"""
+Builds the optional compiled move-generation kernel:
+
+    python setup.py build_ext --inplace
+
+The game runs fine without it; ChessEngine falls back to pure Python when the
+extension (or Cython itself) is missing.
+"""
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="Chess",
+    ext_modules=cythonize("Chess/_movegen_cy.pyx", language_level=3),
+)